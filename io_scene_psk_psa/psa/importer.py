@@ -1,5 +1,9 @@
+import os
+import threading
 import typing
-from typing import List, Optional
+from collections import deque
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
 
 import bpy
 import numpy as np
@@ -9,6 +13,16 @@ from mathutils import Vector, Quaternion
 from .config import PsaConfig, REMOVE_TRACK_LOCATION, REMOVE_TRACK_ROTATION
 from .data import Psa
 from .reader import PsaReader
+from ..shared.jit import HAS_NUMBA, njit
+from ..shared.quaternions import quaternion_conjugate, quaternion_multiply, quaternion_normalize, quaternion_to_matrix
+
+
+# Each worker thread reads sequence data into its own reusable buffer (see _get_sequence_data_buffer).
+_sequence_data_buffers = threading.local()
+
+# The maximum number of worker threads used to read and convert sequence data. Each finished sequence data matrix is held
+# in memory until the main thread writes it, so this is kept small and fixed rather than scaled with the core count.
+_MAX_WORKER_COUNT = 4
 
 
 class PsaImportOptions(object):
@@ -50,28 +64,116 @@ class ImportBone(object):
         self.parent: Optional[ImportBone] = None
         self.armature_bone = None
         self.pose_bone = None
+        self.rotation_data_path: str = ''
+        self.location_data_path: str = ''
         self.original_location: Vector = Vector()
         self.original_rotation: Quaternion = Quaternion()
         self.post_rotation: Quaternion = Quaternion()
-        self.fcurves: List[FCurve] = []
-
-
-def _calculate_fcurve_data(import_bone: ImportBone, key_data: typing.Iterable[float]):
-    # Convert world-space transforms to local-space transforms.
-    key_rotation = Quaternion(key_data[0:4])
-    key_location = Vector(key_data[4:])
-    q = import_bone.post_rotation.copy()
-    q.rotate(import_bone.original_rotation)
-    rotation = q
-    q = import_bone.post_rotation.copy()
-    if import_bone.parent is None:
-        q.rotate(key_rotation.conjugated())
-    else:
-        q.rotate(key_rotation)
-    rotation.rotate(q.conjugated())
-    location = key_location - import_bone.original_location
-    location.rotate(import_bone.post_rotation.conjugated())
-    return rotation.w, rotation.x, rotation.y, rotation.z, location.x, location.y, location.z
+        self.post_rotation_conjugated: Quaternion = Quaternion()
+
+
+class ImportBoneTransforms(object):
+    """
+    The per-bone data needed to convert sequence data from world-space to local-space, packed into contiguous arrays.
+    Only the bones that map to the armature are packed; `indices` maps them back to their PSA bone indices.
+    """
+    def __init__(self, import_bones: List[Optional[ImportBone]]):
+        self.indices = np.array([i for i, x in enumerate(import_bones) if x is not None], dtype=np.int32)
+        mapped_import_bones = [import_bones[i] for i in self.indices]
+        # The key rotations of root bones are conjugated. Multiplying the vector part by this sign does that without a
+        # per-bone branch.
+        self.conjugation_signs = np.where([x.parent is None for x in mapped_import_bones], -1.0, 1.0).astype(np.float32)
+        self.post_rotations = np.array([tuple(x.post_rotation.normalized()) for x in mapped_import_bones],
+                                       dtype=np.float32).reshape(-1, 4)
+        # The locations are rotated by the conjugated post rotation, which is expanded into a rotation matrix once here.
+        self.location_rotations = quaternion_to_matrix(
+            np.array([tuple(x.post_rotation_conjugated) for x in mapped_import_bones], dtype=np.float32).reshape(-1, 4))
+        self.original_locations = np.array([tuple(x.original_location) for x in mapped_import_bones],
+                                           dtype=np.float32).reshape(-1, 3)
+
+
+@njit(nogil=True, cache=True, fastmath=True)
+def _convert_world_to_local_kernel(sequence_data_matrix: np.ndarray,
+                                   post_quat: np.ndarray,
+                                   loc_rot: np.ndarray,
+                                   orig_loc: np.ndarray,
+                                   conj_sign: np.ndarray,
+                                   out: np.ndarray):
+    """
+    Compiled equivalent of the NumPy path in _convert_world_to_local_batch.
+    Every frame is calculated with scalar arithmetic so that no temporary arrays are allocated. The GIL is released so
+    that several sequences can be converted at once on worker threads.
+    """
+    frame_count, bone_count = sequence_data_matrix.shape[0], sequence_data_matrix.shape[1]
+    for bone_index in range(bone_count):
+        pw, px, py, pz = post_quat[bone_index, 0], post_quat[bone_index, 1], \
+            post_quat[bone_index, 2], post_quat[bone_index, 3]
+        m00, m01, m02 = loc_rot[bone_index, 0, 0], loc_rot[bone_index, 0, 1], loc_rot[bone_index, 0, 2]
+        m10, m11, m12 = loc_rot[bone_index, 1, 0], loc_rot[bone_index, 1, 1], loc_rot[bone_index, 1, 2]
+        m20, m21, m22 = loc_rot[bone_index, 2, 0], loc_rot[bone_index, 2, 1], loc_rot[bone_index, 2, 2]
+        lx, ly, lz = orig_loc[bone_index, 0], orig_loc[bone_index, 1], orig_loc[bone_index, 2]
+        sign = conj_sign[bone_index]
+        for frame_index in range(frame_count):
+            key = sequence_data_matrix[frame_index, bone_index]
+            kw, kx, ky, kz = key[0], key[1], key[2], key[3]
+            length = np.sqrt(kw * kw + kx * kx + ky * ky + kz * kz)
+            if length == 0.0:
+                length = 1.0
+            kw, kx, ky, kz = kw / length, sign * kx / length, sign * ky / length, sign * kz / length
+            # r = conjugate(key * post)
+            rw = kw * pw - kx * px - ky * py - kz * pz
+            rx = -(kw * px + kx * pw + ky * pz - kz * py)
+            ry = -(kw * py - kx * pz + ky * pw + kz * px)
+            rz = -(kw * pz + kx * py - ky * px + kz * pw)
+            length = np.sqrt(rw * rw + rx * rx + ry * ry + rz * rz)
+            if length == 0.0:
+                length = 1.0
+            if rw < 0.0:
+                length = -length
+            vx, vy, vz = key[4] - lx, key[5] - ly, key[6] - lz
+            out[frame_index, bone_index, 0] = rw / length
+            out[frame_index, bone_index, 1] = rx / length
+            out[frame_index, bone_index, 2] = ry / length
+            out[frame_index, bone_index, 3] = rz / length
+            out[frame_index, bone_index, 4] = m00 * vx + m01 * vy + m02 * vz
+            out[frame_index, bone_index, 5] = m10 * vx + m11 * vy + m12 * vz
+            out[frame_index, bone_index, 6] = m20 * vx + m21 * vy + m22 * vz
+
+
+def _convert_world_to_local_batch(sequence_data_matrix: np.ndarray,
+                                  post_quat: np.ndarray,
+                                  loc_rot: np.ndarray,
+                                  orig_loc: np.ndarray,
+                                  conj_sign: np.ndarray) -> np.ndarray:
+    """
+    Converts world-space transforms to local-space transforms for every frame and bone at once.
+    @param sequence_data_matrix: FxBx7 matrix of world-space (Qw, Qx, Qy, Qz, Lx, Ly, Lz) data.
+    @param post_quat: Bx4 matrix of the post rotation of each bone.
+    @param loc_rot: Bx3x3 matrix of the rotation matrix applied to the location of each bone (the conjugated post
+    rotation).
+    @param orig_loc: Bx3 matrix of the original location of each bone.
+    @param conj_sign: B-length array of the sign of the vector part of each bone's key rotations (-1 for bones that
+    have no parent, whose key rotations are conjugated, and 1 otherwise).
+    @return: An FxBx7 matrix of the local-space (Qw, Qx, Qy, Qz, Lx, Ly, Lz) data.
+    """
+    if HAS_NUMBA:
+        out = np.empty_like(sequence_data_matrix)
+        _convert_world_to_local_kernel(sequence_data_matrix, post_quat, loc_rot, orig_loc, conj_sign, out)
+        return out
+
+    key_rotations = quaternion_normalize(sequence_data_matrix[..., :4])
+    key_rotations[..., 1:] *= conj_sign[:, None]
+
+    # The rotation is the conjugate of (key * post). See import_psa for why there is no (orig * post) factor.
+    rotations = quaternion_normalize(quaternion_conjugate(quaternion_multiply(key_rotations, post_quat)))
+    # Match the canonical (non-negative W) form that mathutils produces when rotating quaternions.
+    rotations *= np.where(rotations[..., :1] < 0.0, -1.0, 1.0)
+
+    # The location is rotated by the conjugate of the post rotation.
+    # The rotation is constant for each bone, so all frames are rotated with a single batched matrix product.
+    locations = np.einsum('bij,fbj->fbi', loc_rot, sequence_data_matrix[..., 4:] - orig_loc, optimize=True)
+
+    return np.concatenate((rotations, locations), axis=-1)
 
 
 class PsaImportResult:
@@ -79,21 +181,28 @@ class PsaImportResult:
         self.warnings: List[str] = []
 
 
-def _get_armature_bone_index_for_psa_bone(psa_bone_name: str, armature_bone_names: List[str], bone_mapping_mode: str = 'EXACT') -> Optional[int]:
+def _get_bone_mapping_key(bone_name: str, bone_mapping_mode: str = 'EXACT') -> str:
+    """
+    @param bone_name: The name of the bone.
+    @param bone_mapping_mode: One of 'EXACT' or 'CASE_INSENSITIVE'.
+    @return: The key used to match the bone name against other bone names for the given bone mapping mode.
+    """
+    return bone_name.lower() if bone_mapping_mode == 'CASE_INSENSITIVE' else bone_name
+
+
+def _get_armature_bone_name_indices(armature_bone_names: List[str], bone_mapping_mode: str = 'EXACT') -> Dict[str, int]:
     """
-    @param psa_bone_name: The name of the PSA bone.
     @param armature_bone_names: The names of the bones in the armature.
     @param bone_mapping_mode: One of 'EXACT' or 'CASE_INSENSITIVE'.
-    @return: The index of the armature bone that corresponds to the given PSA bone, or None if no such bone exists.
+    @return: A dictionary of bone mapping keys to armature bone indices. If more than one armature bone has the same key,
+    the first one is used.
     """
+    armature_bone_name_indices = dict()
     for armature_bone_index, armature_bone_name in enumerate(armature_bone_names):
-        if bone_mapping_mode == 'CASE_INSENSITIVE':
-            if armature_bone_name.lower() == psa_bone_name.lower():
-                return armature_bone_index
-        else:
-            if armature_bone_name == psa_bone_name:
-                return armature_bone_index
-    return None
+        key = _get_bone_mapping_key(armature_bone_name, bone_mapping_mode)
+        armature_bone_name_indices.setdefault(key, armature_bone_index)
+    return armature_bone_name_indices
+
 
 def _get_sample_frame_times(source_frame_count: int, frame_step: float) -> typing.Iterable[float]:
     # TODO: for correctness, we should also emit the target frame time as well (because the last frame can be a
@@ -105,6 +214,29 @@ def _get_sample_frame_times(source_frame_count: int, frame_step: float) -> typin
     yield source_frame_count - 1
 
 
+def _quaternion_slerp(a: np.ndarray, b: np.ndarray, factors: np.ndarray) -> np.ndarray:
+    """
+    Spherically interpolates between two arrays of quaternions along the shortest arc.
+    @param a: An ...x4 array of quaternions in (w, x, y, z) order.
+    @param b: An ...x4 array of quaternions in (w, x, y, z) order.
+    @param factors: An array of interpolation factors that is broadcastable against a[..., 0].
+    @return: An ...x4 array of the normalized interpolated quaternions.
+    """
+    a = quaternion_normalize(a)
+    b = quaternion_normalize(b)
+    cosom = np.sum(a * b, axis=-1)
+    # Rotate around the shortest angle.
+    a = np.where(cosom[..., None] < 0.0, -a, a)
+    cosom = np.abs(cosom)
+    # Fall back to linear interpolation when the quaternions are (nearly) aligned.
+    should_slerp = cosom < (1.0 - 1e-4)
+    omega = np.arccos(np.minimum(cosom, 1.0))
+    sinom = np.where(should_slerp, np.sin(omega), 1.0)
+    w0 = np.where(should_slerp, np.sin((1.0 - factors) * omega) / sinom, 1.0 - factors)
+    w1 = np.where(should_slerp, np.sin(factors * omega) / sinom, factors)
+    return quaternion_normalize(w0[..., None] * a + w1[..., None] * b)
+
+
 def _resample_sequence_data_matrix(sequence_data_matrix: np.ndarray, frame_step: float = 1.0) -> np.ndarray:
     """
     Resamples the sequence data matrix to the target frame count.
@@ -117,31 +249,111 @@ def _resample_sequence_data_matrix(sequence_data_matrix: np.ndarray, frame_step:
         # No resampling is necessary.
         return sequence_data_matrix
 
-    source_frame_count, bone_count = sequence_data_matrix.shape[:2]
-    sample_frame_times = list(_get_sample_frame_times(source_frame_count, frame_step))
-    target_frame_count = len(sample_frame_times)
-    resampled_sequence_data_matrix = np.zeros((target_frame_count, bone_count, 7), dtype=float)
+    source_frame_count = sequence_data_matrix.shape[0]
+    sample_frame_times = np.fromiter(_get_sample_frame_times(source_frame_count, frame_step), dtype=float)
+    frame_indices = sample_frame_times.astype(int)
 
-    for sample_frame_index, sample_frame_time in enumerate(sample_frame_times):
-        frame_index = int(sample_frame_time)
-        if sample_frame_time % 1.0 == 0.0:
-            # Sample time has no fractional part, so just copy the frame.
-            resampled_sequence_data_matrix[sample_frame_index, :, :] = sequence_data_matrix[frame_index, :, :]
-        else:
-            # Sample time has a fractional part, so interpolate between two frames.
-            next_frame_index = frame_index + 1
-            for bone_index in range(bone_count):
-                source_frame_1_data = sequence_data_matrix[frame_index, bone_index, :]
-                source_frame_2_data = sequence_data_matrix[next_frame_index, bone_index, :]
-                factor = sample_frame_time - frame_index
-                q = Quaternion((source_frame_1_data[:4])).slerp(Quaternion((source_frame_2_data[:4])), factor)
-                q.normalize()
-                l = Vector(source_frame_1_data[4:]).lerp(Vector(source_frame_2_data[4:]), factor)
-                resampled_sequence_data_matrix[sample_frame_index, bone_index, :] = q.w, q.x, q.y, q.z, l.x, l.y, l.z
+    # Sample times with no fractional part are copied from the source frame as-is.
+    resampled_sequence_data_matrix = sequence_data_matrix[frame_indices, :, :]
+
+    # Sample times with a fractional part are interpolated between two frames.
+    is_fractional = (sample_frame_times % 1.0) != 0.0
+    frame_indices = frame_indices[is_fractional]
+    factors = (sample_frame_times[is_fractional] - frame_indices).astype(sequence_data_matrix.dtype)[:, None]
+    source_frame_1_data = sequence_data_matrix[frame_indices, :, :]
+    source_frame_2_data = sequence_data_matrix[frame_indices + 1, :, :]
+    q = _quaternion_slerp(source_frame_1_data[..., :4], source_frame_2_data[..., :4], factors)
+    l = source_frame_1_data[..., 4:] * (1.0 - factors[..., None]) + source_frame_2_data[..., 4:] * factors[..., None]
+    resampled_sequence_data_matrix[is_fractional] = np.concatenate((q, l), axis=-1)
 
     return resampled_sequence_data_matrix
 
 
+def _get_target_fps(context: Context, options: PsaImportOptions, sequence: Psa.Sequence) -> float:
+    match options.fps_source:
+        case 'CUSTOM':
+            return options.fps_custom
+        case 'SCENE':
+            return context.scene.render.fps
+        case 'SEQUENCE':
+            return sequence.fps
+        case _:
+            raise ValueError(f'Unknown FPS source: {options.fps_source}')
+
+
+def _get_sequence_data_buffer(frame_count: int, bone_count: int) -> np.ndarray:
+    """
+    Gets a float32 buffer for reading sequence data into, which is reused by the calling thread between sequences.
+    The buffer is only reallocated when it is too small for the sequence.
+    @return: An FxBx7 view of the buffer.
+    """
+    buffer = getattr(_sequence_data_buffers, 'buffer', None)
+    if buffer is None or buffer.shape[0] < frame_count or buffer.shape[1] != bone_count:
+        buffer = np.empty((frame_count, bone_count, 7), dtype=np.float32)
+        _sequence_data_buffers.buffer = buffer
+    return buffer[:frame_count]
+
+
+def _read_local_sequence_data_matrix(psa_reader: PsaReader,
+                                     sequence_name: str,
+                                     import_bone_transforms: ImportBoneTransforms,
+                                     translation_scale: float,
+                                     frame_step: float) -> np.ndarray:
+    """
+    Reads the data matrix for a sequence, converts it from world-space to local-space and resamples it.
+    Only the bones that map to the armature are kept, so no work is done for bones that will not be written.
+    This does not touch any Blender data, so it is safe to call from worker threads.
+    @return: The resampled FxMx7 sequence data matrix in local-space, where M is the number of mapped bones, in the
+    order of `import_bone_transforms.indices`.
+    """
+    sequence = psa_reader.sequences[sequence_name]
+    buffer = _get_sequence_data_buffer(sequence.frame_count, len(psa_reader.bones))
+    # Selecting the mapped bones copies them out of the buffer, so the buffer is free to be reused by the next call.
+    sequence_data_matrix = psa_reader.read_sequence_data_matrix(sequence_name, out=buffer)[:, import_bone_transforms.indices]
+
+    if translation_scale != 1.0:
+        # Scale the translation data.
+        sequence_data_matrix[:, :, 4:] *= translation_scale
+
+    # Convert the sequence's data from world-space to local-space.
+    sequence_data_matrix = _convert_world_to_local_batch(sequence_data_matrix,
+                                                         import_bone_transforms.post_rotations,
+                                                         import_bone_transforms.location_rotations,
+                                                         import_bone_transforms.original_locations,
+                                                         import_bone_transforms.conjugation_signs)
+
+    # Resample the sequence data to the target FPS.
+    # If the target frame count is the same as the source frame count, this will be a no-op.
+    return _resample_sequence_data_matrix(sequence_data_matrix, frame_step=frame_step)
+
+
+def _get_fcurve_write_mask(bone_indices: np.ndarray, bone_track_flags: Dict[int, int]) -> np.ndarray:
+    """
+    @param bone_indices: The PSA bone indices of the mapped bones.
+    @param bone_track_flags: A dictionary of PSA bone indices to the track flags from the PSA config.
+    @return: An Mx7 boolean matrix of whether the (Qw, Qx, Qy, Qz, Lx, Ly, Lz) f-curves of each mapped bone are written.
+    """
+    track_flags = np.array([bone_track_flags.get(x, 0) for x in bone_indices], dtype=np.int32)
+    fcurve_write_mask = np.empty((len(bone_indices), 7), dtype=bool)
+    fcurve_write_mask[:, :4] = ((track_flags & REMOVE_TRACK_ROTATION) == 0)[:, None]
+    fcurve_write_mask[:, 4:] = ((track_flags & REMOVE_TRACK_LOCATION) == 0)[:, None]
+    return fcurve_write_mask
+
+
+def _map_ordered(executor: Executor, function: Callable, iterable: Iterable[tuple], max_pending: int) -> Iterator:
+    """
+    Like Executor.map, but only keeps up to max_pending calls in flight at a time so that results that have not been
+    consumed yet do not pile up in memory. At most max_pending results (plus the one being consumed) are held at once.
+    """
+    pending = deque()
+    for args in iterable:
+        if len(pending) >= max_pending:
+            yield pending.popleft().result()
+        pending.append(executor.submit(function, *args))
+    while len(pending) > 0:
+        yield pending.popleft().result()
+
+
 def import_psa(context: Context, psa_reader: PsaReader, armature_object: Object, options: PsaImportOptions) -> PsaImportResult:
     result = PsaImportResult()
     sequences = [psa_reader.sequences[x] for x in options.sequence_names]
@@ -151,12 +363,16 @@ def import_psa(context: Context, psa_reader: PsaReader, armature_object: Object,
     psa_to_armature_bone_indices = {}
     armature_to_psa_bone_indices = {}
     armature_bone_names = [x.name for x in armature_data.bones]
-    psa_bone_names = []
+    armature_bone_name_indices = _get_armature_bone_name_indices(armature_bone_names, options.bone_mapping_mode)
     duplicate_mappings = []
+    # The indices of PSA bones that have no matching armature bone, collected while mapping rather than in another pass.
+    missing_psa_bone_indices = []
+
+    # Decode the PSA bone names once. Once a PSA bone is mapped, its name is replaced with that of the armature bone.
+    psa_bone_names: List[str] = [x.name.decode('windows-1252') for x in psa_reader.bones]
 
-    for psa_bone_index, psa_bone in enumerate(psa_reader.bones):
-        psa_bone_name: str = psa_bone.name.decode('windows-1252')
-        armature_bone_index = _get_armature_bone_index_for_psa_bone(psa_bone_name, armature_bone_names, options.bone_mapping_mode)
+    for psa_bone_index, psa_bone_name in enumerate(psa_bone_names):
+        armature_bone_index = armature_bone_name_indices.get(_get_bone_mapping_key(psa_bone_name, options.bone_mapping_mode))
         if armature_bone_index is not None:
             # Ensure that no other PSA bone has been mapped to this armature bone yet.
             if armature_bone_index not in armature_to_psa_bone_indices:
@@ -165,9 +381,9 @@ def import_psa(context: Context, psa_reader: PsaReader, armature_object: Object,
             else:
                 # This armature bone has already been mapped to a PSA bone.
                 duplicate_mappings.append((psa_bone_index, armature_bone_index, armature_to_psa_bone_indices[armature_bone_index]))
-            psa_bone_names.append(armature_bone_names[armature_bone_index])
+            psa_bone_names[psa_bone_index] = armature_bone_names[armature_bone_index]
         else:
-            psa_bone_names.append(psa_bone_name)
+            missing_psa_bone_indices.append(psa_bone_index)
 
     # Warn about duplicate bone mappings.
     if len(duplicate_mappings) > 0:
@@ -178,14 +394,15 @@ def import_psa(context: Context, psa_reader: PsaReader, armature_object: Object,
             result.warnings.append(f'PSA bone {psa_bone_index} ({psa_bone_name}) could not be mapped to armature bone {armature_bone_index} ({armature_bone_name}) because the armature bone is already mapped to PSA bone {mapped_psa_bone_index} ({mapped_psa_bone_name})')
 
     # Report if there are missing bones in the target armature.
-    missing_bone_names = set(psa_bone_names).difference(set(armature_bone_names))
-    if len(missing_bone_names) > 0:
+    if len(missing_psa_bone_indices) > 0:
+        # The names are only gathered when there is something to report.
+        missing_bone_names = {psa_bone_names[x] for x in missing_psa_bone_indices}
         result.warnings.append(
             f'The armature \'{armature_object.name}\' is missing {len(missing_bone_names)} bones that exist in '
             'the PSA:\n' +
-            str(list(sorted(missing_bone_names)))
+            str(sorted(missing_bone_names))
         )
-    del armature_bone_names
+    del armature_bone_names, armature_bone_name_indices
 
     # Create intermediate bone data for import operations.
     import_bones = []
@@ -199,6 +416,9 @@ def import_psa(context: Context, psa_reader: PsaReader, armature_object: Object,
         import_bone = ImportBone(psa_bone)
         import_bone.armature_bone = armature_data.bones[psa_bone_name]
         import_bone.pose_bone = armature_object.pose.bones[psa_bone_name]
+        # The data paths do not change between sequences, so look them up once.
+        import_bone.rotation_data_path = import_bone.pose_bone.path_from_id('rotation_quaternion')
+        import_bone.location_data_path = import_bone.pose_bone.path_from_id('location')
         psa_bone_names_to_import_bones[psa_bone_name] = import_bone
         import_bones.append(import_bone)
 
@@ -208,17 +428,18 @@ def import_psa(context: Context, psa_reader: PsaReader, armature_object: Object,
         armature_bone = import_bone.armature_bone
         has_parent = armature_bone.parent is not None
         if has_parent:
-            if armature_bone.parent.name in psa_bone_names:
+            if armature_bone.parent.name in psa_bone_names_to_import_bones:
                 import_bone.parent = psa_bone_names_to_import_bones[armature_bone.parent.name]
             else:
                 # Add a warning if the parent bone is not in the PSA.
                 bones_with_missing_parents.append(armature_bone)
         # Calculate the original location & rotation of each bone (in world-space maybe?)
         if has_parent:
+            parent_rotation_conjugated = armature_bone.parent.matrix_local.to_quaternion().conjugated()
             import_bone.original_location = armature_bone.matrix_local.translation - armature_bone.parent.matrix_local.translation
-            import_bone.original_location.rotate(armature_bone.parent.matrix_local.to_quaternion().conjugated())
+            import_bone.original_location.rotate(parent_rotation_conjugated)
             import_bone.original_rotation = armature_bone.matrix_local.to_quaternion()
-            import_bone.original_rotation.rotate(armature_bone.parent.matrix_local.to_quaternion().conjugated())
+            import_bone.original_rotation.rotate(parent_rotation_conjugated)
             import_bone.original_rotation.conjugate()
         else:
             import_bone.original_location = armature_bone.matrix_local.translation.copy()
@@ -226,6 +447,15 @@ def import_psa(context: Context, psa_reader: PsaReader, armature_object: Object,
 
         import_bone.post_rotation = import_bone.original_rotation.conjugated()
 
+        # The local rotation of each key is (orig * post) rotated by the conjugate of (key * post). The post rotation is
+        # the conjugate of the (unit) original rotation, so (orig * post) is the identity and the local rotation reduces
+        # to the conjugate of (key * post) alone.
+
+        # This is constant for each bone, so calculate it once here rather than for every frame.
+        import_bone.post_rotation_conjugated = import_bone.post_rotation.normalized().conjugated()
+
+    import_bone_transforms = ImportBoneTransforms(import_bones)
+
     # Warn about bones with missing parents.
     if len(bones_with_missing_parents) > 0:
         count = len(bones_with_missing_parents)
@@ -234,111 +464,96 @@ def import_psa(context: Context, psa_reader: PsaReader, armature_object: Object,
 
     context.window_manager.progress_begin(0, len(sequences))
 
-    # Create and populate the data for new sequences.
-    actions = []
-    for sequence_index, sequence in enumerate(sequences):
-        # Add the action.
-        sequence_name = sequence.name.decode('windows-1252')
-        action_name = options.action_name_prefix + sequence_name
-
-        # Get the bone track flags for this sequence, or an empty dictionary if none exist.
-        sequence_bone_track_flags = dict()
-        if sequence_name in options.psa_config.sequence_bone_flags.keys():
-            sequence_bone_track_flags = options.psa_config.sequence_bone_flags[sequence_name]
-
-        if options.should_overwrite and action_name in bpy.data.actions:
-            action = bpy.data.actions[action_name]
-        else:
-            action = bpy.data.actions.new(name=action_name)
-
-        # Calculate the target FPS.
-        match options.fps_source:
-            case 'CUSTOM':
-                target_fps = options.fps_custom
-            case 'SCENE':
-                target_fps = context.scene.render.fps
-            case 'SEQUENCE':
-                target_fps = sequence.fps
-            case _:
-                raise ValueError(f'Unknown FPS source: {options.fps_source}')
-
-        if options.should_write_keyframes:
-            # Remove existing f-curves.
-            action.fcurves.clear()
-
-            # Create f-curves for the rotation and location of each bone.
-            for psa_bone_index, armature_bone_index in psa_to_armature_bone_indices.items():
-                bone_track_flags = sequence_bone_track_flags.get(psa_bone_index, 0)
-                import_bone = import_bones[psa_bone_index]
-                pose_bone = import_bone.pose_bone
-                rotation_data_path = pose_bone.path_from_id('rotation_quaternion')
-                location_data_path = pose_bone.path_from_id('location')
-                add_rotation_fcurves = (bone_track_flags & REMOVE_TRACK_ROTATION) == 0
-                add_location_fcurves = (bone_track_flags & REMOVE_TRACK_LOCATION) == 0
-                import_bone.fcurves = [
-                    action.fcurves.new(rotation_data_path, index=0, action_group=pose_bone.name) if add_rotation_fcurves else None,  # Qw
-                    action.fcurves.new(rotation_data_path, index=1, action_group=pose_bone.name) if add_rotation_fcurves else None,  # Qx
-                    action.fcurves.new(rotation_data_path, index=2, action_group=pose_bone.name) if add_rotation_fcurves else None,  # Qy
-                    action.fcurves.new(rotation_data_path, index=3, action_group=pose_bone.name) if add_rotation_fcurves else None,  # Qz
-                    action.fcurves.new(location_data_path, index=0, action_group=pose_bone.name) if add_location_fcurves else None,  # Lx
-                    action.fcurves.new(location_data_path, index=1, action_group=pose_bone.name) if add_location_fcurves else None,  # Ly
-                    action.fcurves.new(location_data_path, index=2, action_group=pose_bone.name) if add_location_fcurves else None,  # Lz
-                ]
-
-            # Read the sequence data matrix from the PSA.
-            sequence_data_matrix = psa_reader.read_sequence_data_matrix(sequence_name)
-
-            if options.translation_scale != 1.0:
-                # Scale the translation data.
-                sequence_data_matrix[:, :, 4:] *= options.translation_scale
-
-            # Convert the sequence's data from world-space to local-space.
-            for bone_index, import_bone in enumerate(import_bones):
-                if import_bone is None:
-                    continue
-                for frame_index in range(sequence.frame_count):
-                    # This bone has writeable keyframes for this frame.
-                    key_data = sequence_data_matrix[frame_index, bone_index]
-                    # Calculate the local-space key data for the bone.
-                    sequence_data_matrix[frame_index, bone_index] = _calculate_fcurve_data(import_bone, key_data)
-
-            # Resample the sequence data to the target FPS.
-            # If the target frame count is the same as the source frame count, this will be a no-op.
-            resampled_sequence_data_matrix = _resample_sequence_data_matrix(sequence_data_matrix,
-                                                                            frame_step=sequence.fps / target_fps)
-
-            # Write the keyframes out.
-            # Note that the f-curve data consists of alternating time and value data.
-            target_frame_count = resampled_sequence_data_matrix.shape[0]
-            fcurve_data = np.zeros(2 * target_frame_count, dtype=float)
-            fcurve_data[0::2] = range(0, target_frame_count)
-
-            for bone_index, import_bone in enumerate(import_bones):
-                if import_bone is None:
-                    continue
-                for fcurve_index, fcurve in enumerate(import_bone.fcurves):
-                    if fcurve is None:
-                        continue
+    sequence_names = [x.name.decode('windows-1252') for x in sequences]
+    target_fpses = [_get_target_fps(context, options, x) for x in sequences]
+
+    # The raw value of the linear keyframe interpolation, used when setting the interpolation of all keyframes at once.
+    linear_interpolation = bpy.types.Keyframe.bl_rna.properties['interpolation'].enum_items['LINEAR'].value
+
+    # The sequence data is read, converted and resampled on worker threads, while the main thread writes the results
+    # into the actions (Blender data must only be modified from the main thread).
+    worker_count = min(os.cpu_count() or 1, _MAX_WORKER_COUNT)
+    with ThreadPoolExecutor(max_workers=worker_count) as executor:
+        sequence_data_matrices = _map_ordered(
+            executor,
+            _read_local_sequence_data_matrix,
+            ((psa_reader, sequence_name, import_bone_transforms, options.translation_scale, sequence.fps / target_fps)
+             for sequence, sequence_name, target_fps in zip(sequences, sequence_names, target_fpses)),
+            max_pending=worker_count
+        ) if options.should_write_keyframes else None
+
+        # Create and populate the data for new sequences.
+        actions = []
+        for sequence_index, (sequence, sequence_name, target_fps) in enumerate(zip(sequences, sequence_names, target_fpses)):
+            # Add the action.
+            action_name = options.action_name_prefix + sequence_name
+
+            # Get the bone track flags for this sequence, or an empty dictionary if none exist.
+            sequence_bone_track_flags = dict()
+            if sequence_name in options.psa_config.sequence_bone_flags.keys():
+                sequence_bone_track_flags = options.psa_config.sequence_bone_flags[sequence_name]
+
+            if options.should_overwrite and action_name in bpy.data.actions:
+                action = bpy.data.actions[action_name]
+            else:
+                action = bpy.data.actions.new(name=action_name)
+
+            if options.should_write_keyframes:
+                # Remove existing f-curves.
+                action.fcurves.clear()
+
+                # Determine which f-curves are written for each mapped bone.
+                fcurve_write_mask = _get_fcurve_write_mask(import_bone_transforms.indices, sequence_bone_track_flags)
+                fcurve_write_indices = np.argwhere(fcurve_write_mask).tolist()
+
+                # Get the sequence data matrix once it has been read, converted and resampled.
+                resampled_sequence_data_matrix = next(sequence_data_matrices)
+
+                # Write the keyframes out.
+                # Note that the f-curve data consists of alternating time and value data.
+                # The buffers match the types that Blender stores the keyframe properties as (the interpolation enum is
+                # stored as a char), so that foreach_set can copy them directly.
+                target_frame_count = resampled_sequence_data_matrix.shape[0]
+                fcurve_data = np.zeros(2 * target_frame_count, dtype=np.float32)
+                fcurve_data[0::2] = range(0, target_frame_count)
+                fcurve_interpolation_data = np.full(target_frame_count, linear_interpolation, dtype=np.int8)
+
+                # The f-curves of the action, indexed by (bone_index * 7 + fcurve_index).
+                fcurves: List[Optional[FCurve]] = [None] * (len(import_bone_transforms.indices) * 7)
+
+                # Create the f-curves for the rotation and location of each bone. The keyframe count is known up front,
+                # so each f-curve's keyframes are allocated once, right after it is created.
+                # The columns of the sequence data matrix are the mapped bones only.
+                for bone_index, fcurve_index in fcurve_write_indices:
+                    import_bone = import_bones[import_bone_transforms.indices[bone_index]]
+                    if fcurve_index < 4:
+                        # Qw, Qx, Qy, Qz
+                        data_path, array_index = import_bone.rotation_data_path, fcurve_index
+                    else:
+                        # Lx, Ly, Lz
+                        data_path, array_index = import_bone.location_data_path, fcurve_index - 4
+                    fcurve = action.fcurves.new(data_path, index=array_index, action_group=import_bone.pose_bone.name)
+                    fcurves[bone_index * 7 + fcurve_index] = fcurve
                     fcurve_data[1::2] = resampled_sequence_data_matrix[:, bone_index, fcurve_index]
                     fcurve.keyframe_points.add(target_frame_count)
                     fcurve.keyframe_points.foreach_set('co', fcurve_data)
-                    for fcurve_keyframe in fcurve.keyframe_points:
-                        fcurve_keyframe.interpolation = 'LINEAR'
+                    fcurve.keyframe_points.foreach_set('interpolation', fcurve_interpolation_data)
+                    fcurve.update()
 
-            if options.should_convert_to_samples:
-                # Bake the curve to samples.
-                for fcurve in action.fcurves:
-                    fcurve.convert_to_samples(start=0, end=sequence.frame_count)
+                if options.should_convert_to_samples:
+                    # Bake the curve to samples.
+                    for fcurve in filter(lambda x: x is not None, fcurves):
+                        fcurve.convert_to_samples(start=0, end=sequence.frame_count)
 
-        # Write meta-data.
-        if options.should_write_metadata:
-            action.psa_export.fps = target_fps
+            # Write meta-data.
+            if options.should_write_metadata:
+                action.psa_export.fps = target_fps
 
-        action.use_fake_user = options.should_use_fake_user
+            action.use_fake_user = options.should_use_fake_user
 
-        actions.append(action)
+            actions.append(action)
 
-        context.window_manager.progress_update(sequence_index)
+            context.window_manager.progress_update(sequence_index)
 
     # If the user specifies, store the new animations as strips on a non-contributing NLA track.
     if options.should_stash:
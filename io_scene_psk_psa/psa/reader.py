@@ -1,4 +1,6 @@
 import ctypes
+import threading
+from typing import Optional
 
 import numpy as np
 
@@ -27,11 +29,15 @@ class PsaReader(object):
     This class reads the sequences and bone information immediately upon instantiation and holds onto a file handle.
     The keyframe data is not read into memory upon instantiation due to its potentially very large size.
     To read the key data for a particular sequence, call :read_sequence_keys.
+    Sequence data may be read from multiple threads at once.
     """
 
     def __init__(self, path):
         self.keys_data_offset: int = 0
         self.fp = open(path, 'rb')
+        self._fp_lock = threading.Lock()
+        # Each thread reads raw key data into its own reusable buffer (see _read_sequence_keys_buffer).
+        self._keys_buffers = threading.local()
         self.psa: Psa = self._read(self.fp)
 
     def __enter__(self):
@@ -48,22 +54,52 @@ class PsaReader(object):
     def sequences(self):
         return self.psa.sequences
 
-    def read_sequence_data_matrix(self, sequence_name: str) -> np.ndarray:
+    def read_sequence_data_matrix(self, sequence_name: str, out: Optional[np.ndarray] = None) -> np.ndarray:
         """
         Reads and returns the data matrix for the given sequence.
         @param sequence_name: The name of the sequence.
-        @return: An FxBx7 matrix where F is the number of frames, B is the number of bones.
+        @param out: An optional FxBx7 float32 matrix to read the data into. This allows the caller to reuse a buffer
+        between sequences rather than allocating a new one each time.
+        @return: An FxBx7 float32 matrix where F is the number of frames, B is the number of bones.
         """
         sequence = self.psa.sequences[sequence_name]
-        keys = self.read_sequence_keys(sequence_name)
         bone_count = len(self.bones)
         matrix_size = sequence.frame_count, bone_count, 7
-        matrix = np.zeros(matrix_size)
-        keys_iter = iter(keys)
-        for frame_index in range(sequence.frame_count):
-            for bone_index in range(bone_count):
-                matrix[frame_index, bone_index, :] = list(next(keys_iter).data)
-        return matrix
+        if out is None:
+            out = np.empty(matrix_size, dtype=np.float32)
+        elif out.shape != matrix_size or out.dtype != np.float32:
+            raise ValueError(f'Expected a float32 matrix of shape {matrix_size}, got {out.dtype} {out.shape}')
+        # View the raw keys as (Lx, Ly, Lz, Qx, Qy, Qz, Qw, Time) without copying them.
+        keys = np.frombuffer(self._read_sequence_keys_buffer(sequence), dtype=np.float32)
+        keys = keys.reshape(sequence.frame_count, bone_count, sizeof(Psa.Key) // sizeof(c_float))
+        # Reorder the data into (Qw, Qx, Qy, Qz, Lx, Ly, Lz).
+        out[:, :, 0] = keys[:, :, 6]
+        out[:, :, 1:4] = keys[:, :, 3:6]
+        out[:, :, 4:7] = keys[:, :, 0:3]
+        return out
+
+    def _read_sequence_keys_buffer(self, sequence: Psa.Sequence) -> memoryview:
+        """
+        Reads the raw key data for a sequence into a buffer that is reused by the calling thread between sequences.
+        The buffer is only reallocated when it is too small for the sequence.
+        @param sequence: The sequence.
+        @return: A view of the key data, which is only valid until the calling thread reads another sequence.
+        """
+        data_size = sizeof(Psa.Key)
+        bone_count = len(self.psa.bones)
+        buffer_length = data_size * bone_count * sequence.frame_count
+        sequence_keys_offset = self.keys_data_offset + (sequence.frame_start_index * bone_count * data_size)
+        buffer = getattr(self._keys_buffers, 'buffer', None)
+        if buffer is None or len(buffer) < buffer_length:
+            buffer = bytearray(buffer_length)
+            self._keys_buffers.buffer = buffer
+        view = memoryview(buffer)[:buffer_length]
+        with self._fp_lock:
+            self.fp.seek(sequence_keys_offset, 0)
+            read_length = self.fp.readinto(view)
+        if read_length != buffer_length:
+            raise EOFError(f'Expected {buffer_length} bytes of key data, got {read_length}')
+        return view
 
     def read_sequence_keys(self, sequence_name: str) -> List[Psa.Key]:
         """
@@ -72,14 +108,10 @@ class PsaReader(object):
         @param sequence_name: The name of the sequence.
         @return: A list of Psa.Keys.
         """
-        # Set the file reader to the beginning of the keys data
         sequence = self.psa.sequences[sequence_name]
         data_size = sizeof(Psa.Key)
         bone_count = len(self.psa.bones)
-        buffer_length = data_size * bone_count * sequence.frame_count
-        sequence_keys_offset = self.keys_data_offset + (sequence.frame_start_index * bone_count * data_size)
-        self.fp.seek(sequence_keys_offset, 0)
-        buffer = self.fp.read(buffer_length)
+        buffer = self._read_sequence_keys_buffer(sequence)
         offset = 0
         keys = []
         for _ in range(sequence.frame_count * bone_count):
@@ -1,4 +1,6 @@
-from typing import List
+from typing import List, Union
+
+import numpy as np
 
 from ..shared.data import *
 
@@ -113,15 +115,17 @@ class Psk(object):
         return len(self.morph_infos) > 0
     
     def __init__(self):
-        self.points: List[Vector3] = []
-        self.wedges: List[Psk.Wedge] = []
-        self.faces: List[Psk.Face] = []
+        # The per-vertex and per-face data are lists of structures when built for export, and structured arrays of the
+        # same structures when read from a file (see convert_psk_data_to_arrays).
+        self.points: Union[List[Vector3], np.ndarray] = []
+        self.wedges: Union[List[Psk.Wedge], np.ndarray] = []
+        self.faces: Union[List[Psk.Face], np.ndarray] = []
         self.materials: List[Psk.Material] = []
-        self.weights: List[Psk.Weight] = []
+        self.weights: Union[List[Psk.Weight], np.ndarray] = []
         self.bones: List[Psk.Bone] = []
-        self.extra_uvs: List[Vector2] = []
-        self.vertex_colors: List[Color] = []
-        self.vertex_normals: List[Vector3] = []
+        self.extra_uvs: Union[List[Vector2], np.ndarray] = []
+        self.vertex_colors: Union[List[Color], np.ndarray] = []
+        self.vertex_normals: Union[List[Vector3], np.ndarray] = []
         self.morph_infos: List[Psk.MorphInfo] = []
-        self.morph_data: List[Psk.MorphData] = []
+        self.morph_data: Union[List[Psk.MorphData], np.ndarray] = []
         self.material_references: List[str] = []
@@ -1,14 +1,22 @@
-from typing import Optional, List
+from typing import Optional, List, Tuple
 
-import bmesh
 import bpy
 import numpy as np
 from bpy.types import VertexGroup
-from mathutils import Quaternion, Vector, Matrix
+from mathutils import Vector, Matrix
+from numpy.lib.recfunctions import structured_to_unstructured
 
 from .data import Psk
 from .properties import poly_flags_to_triangle_type_and_bit_flags
+from .reader import convert_psk_data_to_arrays
 from ..shared.helpers import rgb_to_srgb, is_bdk_addon_loaded
+from ..shared.jit import HAS_NUMBA, njit
+from ..shared.quaternions import quaternion_conjugate, quaternion_normalize, quaternion_to_matrix
+
+
+# PSK vertex colors are 8-bit, so there are only 256 possible values for each color component. The sRGB conversion of
+# each one is calculated once, up front.
+_SRGB_LUT = rgb_to_srgb(np.arange(256, dtype=np.float32) / 255.0)
 
 
 class PskImportOptions:
@@ -28,22 +36,70 @@ class PskImportOptions:
         self.bdk_repository_id = None
 
 
-class ImportBone:
-    '''
-    Intermediate bone type for the purpose of construction.
-    '''
-    def __init__(self, index: int, psk_bone: Psk.Bone):
-        self.index: int = index
-        self.psk_bone: Psk.Bone = psk_bone
-        self.parent: Optional[ImportBone] = None
-        self.local_rotation: Quaternion = Quaternion()
-        self.local_translation: Vector = Vector()
-        self.world_rotation_matrix: Matrix = Matrix()
-        self.world_matrix: Matrix = Matrix()
-        self.vertex_group = None
-        self.original_rotation: Quaternion = Quaternion()
-        self.original_location: Vector = Vector()
-        self.post_rotation: Quaternion = Quaternion()
+@njit(cache=True)
+def _calculate_bone_world_transforms_kernel(local_rotation_matrices: np.ndarray,
+                                            locations: np.ndarray,
+                                            parent_indices: np.ndarray,
+                                            world_rotation_matrices: np.ndarray,
+                                            world_locations: np.ndarray):
+    """
+    Compiled equivalent of the loop in _calculate_bone_world_transforms.
+    The matrix products are written out as scalar loops, since Numba's matrix multiplication requires SciPy's BLAS.
+    """
+    for bone_index in range(len(parent_indices)):
+        parent_index = parent_indices[bone_index]
+        if bone_index == 0 and parent_index == 0:
+            world_rotation_matrices[bone_index] = local_rotation_matrices[bone_index].T
+            world_locations[bone_index] = locations[bone_index]
+            continue
+        # Copied in case a malformed bone is its own parent.
+        parent_world_rotation_matrix = world_rotation_matrices[parent_index].copy()
+        parent_world_location = world_locations[parent_index].copy()
+        for i in range(3):
+            world_location = parent_world_location[i]
+            for k in range(3):
+                world_location += parent_world_rotation_matrix[i, k] * locations[bone_index, k]
+            world_locations[bone_index, i] = world_location
+            for j in range(3):
+                value = 0.0
+                for k in range(3):
+                    value += parent_world_rotation_matrix[i, k] * local_rotation_matrices[bone_index, k, j]
+                world_rotation_matrices[bone_index, i, j] = value
+
+
+def _calculate_bone_world_transforms(local_rotation_matrices: np.ndarray,
+                                     locations: np.ndarray,
+                                     parent_indices: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Calculates the world transforms of the bones by accumulating their local transforms down the hierarchy. Bones are
+    processed in order, so parents are expected to come before their children.
+    @param local_rotation_matrices: Bx3x3 matrix of the local rotation of each bone. The rotations of child bones are
+    the conjugates of their PSK rotations.
+    @param locations: Bx3 matrix of the local location of each bone.
+    @param parent_indices: B-length array of the parent index of each bone. The root bone is the first bone, with a
+    parent index of 0.
+    @return: The Bx3x3 world rotation matrices and the Bx3 world locations of the bones.
+    """
+    bone_count = len(parent_indices)
+    world_rotation_matrices = np.tile(np.identity(3), (bone_count, 1, 1))
+    world_locations = np.zeros((bone_count, 3))
+
+    if HAS_NUMBA:
+        _calculate_bone_world_transforms_kernel(local_rotation_matrices, locations, parent_indices,
+                                                world_rotation_matrices, world_locations)
+        return world_rotation_matrices, world_locations
+
+    for bone_index, parent_index in enumerate(parent_indices.tolist()):
+        if bone_index == 0 and parent_index == 0:
+            # The root bone uses its local rotation as-is (the transpose of its conjugated rotation matrix).
+            world_rotation_matrices[bone_index] = local_rotation_matrices[bone_index].T
+            world_locations[bone_index] = locations[bone_index]
+            continue
+        parent_world_rotation_matrix = world_rotation_matrices[parent_index]
+        world_rotation_matrices[bone_index] = parent_world_rotation_matrix @ local_rotation_matrices[bone_index]
+        world_locations[bone_index] = world_locations[parent_index] + parent_world_rotation_matrix @ locations[bone_index]
+
+    return world_rotation_matrices, world_locations
 
 
 class PskImportResult:
@@ -52,6 +108,10 @@ class PskImportResult:
 
 
 def import_psk(psk: Psk, context, options: PskImportOptions) -> PskImportResult:
+    # The importer works on the structured arrays that read_psk produces, so convert any data that is still stored as
+    # lists of structures.
+    convert_psk_data_to_arrays(psk)
+
     result = PskImportResult()
     armature_object = None
     mesh_object = None
@@ -74,45 +134,46 @@ def import_psk(psk: Psk, context, options: PskImportOptions) -> PskImportResult:
 
         bpy.ops.object.mode_set(mode='EDIT')
 
-        import_bones = []
-
+        # Gather the name, parent index, rotation and location of every bone in a single pass.
+        bone_count = len(psk.bones)
+        bone_names: List[str] = []
+        bone_parent_indices = np.empty(bone_count, dtype=np.int32)
+        bone_rotations = np.empty((bone_count, 4), dtype=np.float64)
+        bone_locations = np.empty((bone_count, 3), dtype=np.float64)
         for bone_index, psk_bone in enumerate(psk.bones):
-            import_bone = ImportBone(bone_index, psk_bone)
+            # Clamp the parent index so that bones with no parent (-1) are treated as children of the root bone.
             psk_bone.parent_index = max(0, psk_bone.parent_index)
-            import_bone.local_rotation = Quaternion(tuple(psk_bone.rotation))
-            import_bone.local_translation = Vector(tuple(psk_bone.location))
-            if psk_bone.parent_index == 0 and bone_index == 0:
-                import_bone.world_rotation_matrix = import_bone.local_rotation.to_matrix()
-                import_bone.world_matrix = Matrix.Translation(import_bone.local_translation)
-            import_bones.append(import_bone)
-
-        for bone_index, bone in enumerate(import_bones):
-            if bone.psk_bone.parent_index == 0 and bone_index == 0:
-                continue
-            parent = import_bones[bone.psk_bone.parent_index]
-            bone.parent = parent
-            bone.world_matrix = parent.world_rotation_matrix.to_4x4()
-            translation = bone.local_translation.copy()
-            translation.rotate(parent.world_rotation_matrix)
-            bone.world_matrix.translation = parent.world_matrix.translation + translation
-            bone.world_rotation_matrix = bone.local_rotation.conjugated().to_matrix()
-            bone.world_rotation_matrix.rotate(parent.world_rotation_matrix)
-
-        for import_bone in import_bones:
-            bone_name = import_bone.psk_bone.name.decode('utf-8')
+            bone_names.append(psk_bone.name.decode('utf-8'))
+            bone_parent_indices[bone_index] = psk_bone.parent_index
+            bone_rotations[bone_index] = tuple(psk_bone.rotation)
+            bone_locations[bone_index] = tuple(psk_bone.location)
+
+        bone_rotations = quaternion_normalize(bone_rotations)
+
+        # The local rotation matrices of all bones, calculated at once. Child bones are rotated by the conjugate of their
+        # local rotation.
+        bone_local_rotation_matrices = quaternion_to_matrix(quaternion_conjugate(bone_rotations))
+
+        bone_world_rotation_matrices, bone_world_locations = _calculate_bone_world_transforms(
+            bone_local_rotation_matrices, bone_locations, bone_parent_indices)
+
+        # Compose the edit bone matrices from the world transforms.
+        edit_bone_matrices = np.tile(np.identity(4), (bone_count, 1, 1))
+        edit_bone_matrices[:, :3, :3] = bone_world_rotation_matrices
+        edit_bone_matrices[:, :3, 3] = bone_world_locations
+
+        # Edit bones are stored in a linked list, so looking one up by index walks the list. Keep our own list of the
+        # created edit bones to look up the parents instead.
+        edit_bones = []
+        for bone_index, (bone_name, parent_index) in enumerate(zip(bone_names, bone_parent_indices.tolist())):
             edit_bone = armature_data.edit_bones.new(bone_name)
+            edit_bones.append(edit_bone)
 
-            if import_bone.parent is not None:
-                edit_bone.parent = armature_data.edit_bones[import_bone.psk_bone.parent_index]
-            else:
-                import_bone.local_rotation.conjugate()
+            if bone_index != 0 or parent_index != 0:
+                edit_bone.parent = edit_bones[parent_index]
 
             edit_bone.tail = Vector((0.0, options.bone_length, 0.0))
-            edit_bone_matrix = import_bone.local_rotation.conjugated()
-            edit_bone_matrix.rotate(import_bone.world_matrix)
-            edit_bone_matrix = edit_bone_matrix.to_matrix().to_4x4()
-            edit_bone_matrix.translation = import_bone.world_matrix.translation
-            edit_bone.matrix = edit_bone_matrix
+            edit_bone.matrix = Matrix(edit_bone_matrices[bone_index])
 
     # MESH
     if options.should_import_mesh:
@@ -143,126 +204,156 @@ def import_psk(psk: Psk, context, options: PskImportOptions) -> PskImportResult:
                     material.use_nodes = True
                 mesh_data.materials.append(material)
 
-        bm = bmesh.new()
+        # Gather the per-element data into flat arrays (one per field) once, so that the loops below index arrays rather
+        # than looking up attributes on each PSK struct.
+        points = structured_to_unstructured(psk.points, dtype=np.float32)
+        wedge_point_indices = psk.wedges['point_index'].astype(np.int64)
+        wedge_uvs = np.stack((psk.wedges['u'], psk.wedges['v']), axis=-1)
+        # The wedge indices of each face, in the reverse order to match the winding order of Blender's faces.
+        # 64-bit indices are used so that large 32-bit wedge indices cannot wrap around to valid negative indices.
+        face_wedge_indices = psk.faces['wedge_indices'].astype(np.int64)[:, ::-1]
+        face_point_indices = wedge_point_indices[face_wedge_indices]
 
-        # VERTICES
-        for point in psk.points:
-            bm.verts.new(tuple(point))
+        # The point indices are written straight into the mesh's loops, so make sure that they are all in range first.
+        if len(face_point_indices) > 0 and face_point_indices.max() >= len(points):
+            raise IndexError(f'Faces reference point indices outside the range of the {len(points)} point(s)')
 
-        bm.verts.ensure_lookup_table()
+        # VERTICES
+        # The mesh is written directly with bulk foreach_set calls rather than built up one element at a time in bmesh.
+        mesh_data.vertices.add(len(points))
+        mesh_data.vertices.foreach_set('co', points.ravel())
 
         # FACES
-        invalid_face_indices = set()
-        for face_index, face in enumerate(psk.faces):
-            point_indices = map(lambda i: psk.wedges[i].point_index, reversed(face.wedge_indices))
-            points = [bm.verts[i] for i in point_indices]
-            try:
-                bm_face = bm.faces.new(points)
-                bm_face.material_index = face.material_index
-            except ValueError:
-                # This happens for two reasons:
-                # 1. Two or more of the face's points are the same. (i.e, point indices of [0, 0, 1])
-                # 2. The face is a duplicate of another face. (i.e., point indices of [0, 1, 2] and [0, 1, 2])
-                invalid_face_indices.add(face_index)
+        # A face is invalid for one of two reasons:
+        # 1. Two or more of the face's points are the same. (i.e, point indices of [0, 0, 1])
+        # 2. The face is a duplicate of another face. (i.e., point indices of [0, 1, 2] and [0, 1, 2])
+        # Sorting the point indices of each face makes both checks simple comparisons of the rows.
+        sorted_face_point_indices = np.sort(face_point_indices, axis=1)
+        is_face_valid = (sorted_face_point_indices[:, 0] != sorted_face_point_indices[:, 1]) & \
+                        (sorted_face_point_indices[:, 1] != sorted_face_point_indices[:, 2])
+        # Of each set of duplicate faces, only the first one is kept.
+        non_degenerate_face_indices = np.flatnonzero(is_face_valid)
+        _, unique_face_indices = np.unique(sorted_face_point_indices[non_degenerate_face_indices], axis=0, return_index=True)
+        is_face_valid[:] = False
+        is_face_valid[non_degenerate_face_indices[unique_face_indices]] = True
 
         # TODO: Handle invalid faces better.
-        if len(invalid_face_indices) > 0:
-            result.warnings.append(f'Discarded {len(invalid_face_indices)} invalid face(s).')
-
-        bm.to_mesh(mesh_data)
+        invalid_face_count = len(is_face_valid) - np.count_nonzero(is_face_valid)
+        if invalid_face_count > 0:
+            result.warnings.append(f'Discarded {invalid_face_count} invalid face(s).')
+
+        # Drop the invalid faces once, up front, so that everything downstream can work on the valid faces only.
+        face_wedge_indices = face_wedge_indices[is_face_valid]
+        face_point_indices = face_point_indices[is_face_valid]
+        face_material_indices = psk.faces['material_index'].astype(np.int32)[is_face_valid]
+
+        loop_vertex_indices = face_point_indices.ravel().astype(np.int32)
+        face_count = len(face_point_indices)
+        mesh_data.loops.add(len(loop_vertex_indices))
+        mesh_data.loops.foreach_set('vertex_index', loop_vertex_indices)
+        mesh_data.polygons.add(face_count)
+        mesh_data.polygons.foreach_set('loop_start', np.arange(0, face_count * 3, 3, dtype=np.int32))
+        mesh_data.polygons.foreach_set('material_index', face_material_indices)
+        mesh_data.update(calc_edges=True)
+
+        # The wedge index of each face corner (loop) of the valid faces.
+        loop_wedge_indices = face_wedge_indices.ravel()
 
         # TEXTURE COORDINATES
-        uv_layer_data_index = 0
+        # The V coordinate is flipped, since UVs in Blender have their origin at the bottom-left corner.
+        loop_uvs = wedge_uvs[loop_wedge_indices]
+        loop_uvs[:, 1] = 1.0 - loop_uvs[:, 1]
         uv_layer = mesh_data.uv_layers.new(name='UVMap')
-        for face_index, face in enumerate(psk.faces):
-            if face_index in invalid_face_indices:
-                continue
-            face_wedges = [psk.wedges[i] for i in reversed(face.wedge_indices)]
-            for wedge in face_wedges:
-                uv_layer.data[uv_layer_data_index].uv = wedge.u, 1.0 - wedge.v
-                uv_layer_data_index += 1
+        uv_layer.data.foreach_set('uv', loop_uvs.ravel())
 
         # EXTRA UVS
         if psk.has_extra_uvs and options.should_import_extra_uvs:
             extra_uv_channel_count = int(len(psk.extra_uvs) / len(psk.wedges))
-            wedge_index_offset = 0
+            # The extra UVs are stored channel by channel, with one UV per wedge in each channel.
+            extra_uvs = structured_to_unstructured(psk.extra_uvs, dtype=np.float32).reshape(extra_uv_channel_count, -1, 2)
+            extra_loop_uvs = extra_uvs[:, loop_wedge_indices]
+            extra_loop_uvs[:, :, 1] = 1.0 - extra_loop_uvs[:, :, 1]
             for extra_uv_index in range(extra_uv_channel_count):
-                uv_layer_data_index = 0
                 uv_layer = mesh_data.uv_layers.new(name=f'EXTRAUV{extra_uv_index}')
-                for face_index, face in enumerate(psk.faces):
-                    if face_index in invalid_face_indices:
-                        continue
-                    for wedge_index in reversed(face.wedge_indices):
-                        u, v = psk.extra_uvs[wedge_index_offset + wedge_index]
-                        uv_layer.data[uv_layer_data_index].uv = u, 1.0 - v
-                        uv_layer_data_index += 1
-                wedge_index_offset += len(psk.wedges)
+                uv_layer.data.foreach_set('uv', extra_loop_uvs[extra_uv_index].ravel())
 
         # VERTEX COLORS
         if psk.has_vertex_colors and options.should_import_vertex_colors:
             # Convert vertex colors to sRGB if necessary.
-            psk_vertex_colors = np.zeros((len(psk.vertex_colors), 4))
-            for vertex_color_index in range(len(psk.vertex_colors)):
-                psk_vertex_colors[vertex_color_index,:] = psk.vertex_colors[vertex_color_index].normalized()
+            vertex_colors = structured_to_unstructured(psk.vertex_colors, dtype=np.uint8)
+            psk_vertex_colors = vertex_colors.astype(np.float32) / 255.0
             match options.vertex_color_space:
                 case 'SRGBA':
-                    for i in range(psk_vertex_colors.shape[0]):
-                        psk_vertex_colors[i, :3] = tuple(map(lambda x: rgb_to_srgb(x), psk_vertex_colors[i, :3]))
+                    psk_vertex_colors[:, :3] = _SRGB_LUT[vertex_colors[:, :3]]
                 case _:
                     pass
 
             # Map the PSK vertex colors to the face corners.
-            face_count = len(psk.faces) - len(invalid_face_indices)
-            face_corner_colors = np.full((face_count * 3, 4), 1.0)
-            face_corner_color_index = 0
-            for face_index, face in enumerate(psk.faces):
-                if face_index in invalid_face_indices:
-                    continue
-                for wedge_index in reversed(face.wedge_indices):
-                    face_corner_colors[face_corner_color_index] = psk_vertex_colors[wedge_index]
-                    face_corner_color_index += 1
+            face_corner_colors = psk_vertex_colors[loop_wedge_indices]
 
             # Create the vertex color attribute.
             face_corner_color_attribute = mesh_data.attributes.new(name='VERTEXCOLOR', type='FLOAT_COLOR', domain='CORNER')
-            face_corner_color_attribute.data.foreach_set('color', face_corner_colors.flatten())
+            face_corner_color_attribute.data.foreach_set('color', face_corner_colors.ravel())
 
         # VERTEX NORMALS
+        # All faces are smooth shaded. shade_smooth() simply drops the sharp face attribute rather than writing a value
+        # for every face.
+        mesh_data.shade_smooth()
         if psk.has_vertex_normals and options.should_import_vertex_normals:
-            mesh_data.polygons.foreach_set('use_smooth', [True] * len(mesh_data.polygons))
-            normals = []
-            for vertex_normal in psk.vertex_normals:
-                normals.append(tuple(vertex_normal))
+            normals = structured_to_unstructured(psk.vertex_normals, dtype=np.float32)
             mesh_data.normals_split_custom_set_from_vertices(normals)
-        else:
-            mesh_data.shade_smooth()
-
-        bm.normal_update()
-        bm.free()
 
         # WEIGHTS
+        weight_bone_indices = psk.weights['bone_index']
+        weight_point_indices = psk.weights['point_index']
+        weight_values = psk.weights['weight']
+
         # Get a list of all bones that have weights associated with them.
-        vertex_group_bone_indices = set(map(lambda weight: weight.bone_index, psk.weights))
+        vertex_group_bone_indices = list(set(weight_bone_indices.tolist()))
         vertex_groups: List[Optional[VertexGroup]] = [None] * len(psk.bones)
-        for bone_index, psk_bone in map(lambda x: (x, psk.bones[x]), vertex_group_bone_indices):
-            vertex_groups[bone_index] = mesh_object.vertex_groups.new(name=psk_bone.name.decode('windows-1252'))
-
-        for weight in psk.weights:
-            vertex_groups[weight.bone_index].add((weight.point_index,), weight.weight, 'ADD')
+        vertex_group_names = [psk.bones[bone_index].name.decode('windows-1252') for bone_index in vertex_group_bone_indices]
+        for bone_index, vertex_group_name in zip(vertex_group_bone_indices, vertex_group_names):
+            vertex_groups[bone_index] = mesh_object.vertex_groups.new(name=vertex_group_name)
+
+        # Sort the weights by bone and then by weight value, so that each run of weights that share the same bone and
+        # value can be added to the vertex group in a single call.
+        weight_order = np.lexsort((weight_values, weight_bone_indices))
+        weight_bone_indices = weight_bone_indices[weight_order]
+        weight_point_indices = weight_point_indices[weight_order]
+        weight_values = weight_values[weight_order]
+
+        is_weight_run_start = np.ones(len(weight_order), dtype=bool)
+        is_weight_run_start[1:] = (weight_bone_indices[1:] != weight_bone_indices[:-1]) | (weight_values[1:] != weight_values[:-1])
+        weight_run_starts = np.flatnonzero(is_weight_run_start)
+        weight_run_ends = np.append(weight_run_starts[1:], len(weight_order))
+
+        for run_start, run_end in zip(weight_run_starts.tolist(), weight_run_ends.tolist()):
+            vertex_group = vertex_groups[weight_bone_indices[run_start]]
+            vertex_group.add(weight_point_indices[run_start:run_end].tolist(), float(weight_values[run_start]), 'ADD')
 
         # MORPHS (SHAPE KEYS)
         if options.should_import_shape_keys:
-            morph_data_iterator = iter(psk.morph_data)
+            # The morph data of all morphs, stored back-to-back in the order of the morph infos.
+            morph_point_indices = psk.morph_data['point_index']
+            morph_position_deltas = structured_to_unstructured(psk.morph_data['position_delta'], dtype=np.float32, copy=True)
+            morph_position_deltas[:, 1] = -morph_position_deltas[:, 1]
 
             if psk.has_morph_data:
                 mesh_object.shape_key_add(name='MORPH_BASE', from_mix=False)
 
+            shape_key_co = np.empty(len(points) * 3, dtype=np.float32)
+            morph_data_start = 0
             for morph_info in psk.morph_infos:
                 shape_key = mesh_object.shape_key_add(name=morph_info.name.decode('windows-1252'), from_mix=False)
 
-                for _ in range(morph_info.vertex_count):
-                    morph_data = next(morph_data_iterator)
-                    x, y, z = morph_data.position_delta
-                    shape_key.data[morph_data.point_index].co += Vector((x, -y, z))
+                morph_data_end = morph_data_start + morph_info.vertex_count
+                shape_key.data.foreach_get('co', shape_key_co)
+                # np.add.at is used so that repeated point indices accumulate their deltas.
+                np.add.at(shape_key_co.reshape(-1, 3),
+                          morph_point_indices[morph_data_start:morph_data_end],
+                          morph_position_deltas[morph_data_start:morph_data_end])
+                shape_key.data.foreach_set('co', shape_key_co)
+                morph_data_start = morph_data_end
 
         context.scene.collection.objects.link(mesh_object)
 
@@ -2,8 +2,11 @@ import ctypes
 import os
 import re
 import warnings
+from itertools import groupby
 from pathlib import Path
 
+import numpy as np
+
 from .data import *
 
 
@@ -16,6 +19,97 @@ def _read_types(fp, data_class, section: Section, data):
         offset += section.data_size
 
 
+def _read_array(fp, data_class, section: Section, data: np.ndarray) -> np.ndarray:
+    """
+    Reads the section into a structured array, with the memory layout of the ctypes structure.
+    @param data_class: The ctypes structure of the section's elements.
+    @param data: The array of any elements that were read from previous sections of the same type.
+    @return: An array of the elements in `data`, followed by the elements of this section.
+    """
+    buffer = bytearray(fp.read(section.data_size * section.data_count))
+    array = np.ndarray(shape=(section.data_count,), dtype=np.dtype(data_class), buffer=buffer,
+                       strides=(section.data_size,))
+    return _concatenate_arrays(data, array)
+
+
+def _get_common_dtype(a: np.dtype, b: np.dtype) -> np.dtype:
+    """
+    Gets a structured dtype that can hold the values of two different layouts of the same data (e.g., 16-bit and 32-bit
+    faces). Only the fields that both layouts share are kept (i.e., padding fields are dropped), and each field is
+    widened to a type that can hold the values of both.
+    """
+    fields = []
+    for name in a.names:
+        if name not in b.names:
+            continue
+        field_a, field_b = a.fields[name][0], b.fields[name][0]
+        if field_a == field_b:
+            fields.append((name, field_a))
+            continue
+        if field_a.shape != field_b.shape or field_a.base.names is not None or field_b.base.names is not None:
+            raise RuntimeError(f'Incompatible layouts for field "{name}" ({field_a} and {field_b})')
+        fields.append((name, np.promote_types(field_a.base, field_b.base), field_a.shape))
+    return np.dtype(fields)
+
+
+def _convert_array(array: np.ndarray, dtype: np.dtype) -> np.ndarray:
+    converted = np.zeros(len(array), dtype=dtype)
+    for name in dtype.names:
+        converted[name] = array[name]
+    return converted
+
+
+def _concatenate_arrays(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """
+    Concatenates two structured arrays. If they have different layouts, both are first converted to a common one, since
+    concatenating mismatched structured dtypes would otherwise merge their fields by offset.
+    """
+    if len(a) == 0:
+        return b
+    if a.dtype != b.dtype:
+        dtype = _get_common_dtype(a.dtype, b.dtype)
+        a, b = _convert_array(a, dtype), _convert_array(b, dtype)
+    return np.concatenate((a, b))
+
+
+# The attributes of the PSK that hold per-vertex and per-face data, and the structure of their elements.
+_PSK_ARRAY_ATTRIBUTES = (
+    ('points', Vector3),
+    ('wedges', Psk.Wedge16),
+    ('faces', Psk.Face),
+    ('weights', Psk.Weight),
+    ('extra_uvs', Vector2),
+    ('vertex_colors', Color),
+    ('vertex_normals', Vector3),
+    ('morph_data', Psk.MorphData),
+)
+
+
+def _structures_to_array(structures: list, data_class) -> np.ndarray:
+    array = np.zeros(0, dtype=np.dtype(data_class))
+    for structure_class, group in groupby(structures, key=type):
+        if structure_class is Psk.Wedge:
+            # Wedges built for export are plain objects. Convert them to the structure that the writer uses.
+            group = (Psk.Wedge16(w.point_index, w.u, w.v, w.material_index) for w in group)
+            structure_class = Psk.Wedge16
+        buffer = bytearray(b''.join(map(bytes, group)))
+        array = _concatenate_arrays(array, np.frombuffer(buffer, dtype=np.dtype(structure_class)))
+    return array
+
+
+def convert_psk_data_to_arrays(psk: Psk):
+    """
+    Converts the per-vertex and per-face data of the PSK from lists of structures (e.g., a PSK that was built in memory
+    rather than read from a file) to the structured arrays that read_psk produces. Data that is already an array is left
+    as-is.
+    @param psk: The PSK, which is modified in-place.
+    """
+    for attribute, data_class in _PSK_ARRAY_ATTRIBUTES:
+        data = getattr(psk, attribute)
+        if not isinstance(data, np.ndarray):
+            setattr(psk, attribute, _structures_to_array(data, data_class))
+
+
 def _read_material_references(path: str) -> List[str]:
     property_file_path = Path(path).with_suffix('.props.txt')
     if not property_file_path.is_file():
@@ -31,6 +125,10 @@ def read_psk(path: str) -> Psk:
 
     psk = Psk()
 
+    # The large, per-vertex and per-face sections are read into structured arrays rather than lists of structures, so
+    # that the importer can access each field as a single array.
+    convert_psk_data_to_arrays(psk)
+
     # Read the PSK file sections.
     with open(path, 'rb') as fp:
         while fp.read(1):
@@ -40,35 +138,35 @@ def read_psk(path: str) -> Psk:
                 case b'ACTRHEAD':
                     pass
                 case b'PNTS0000':
-                    _read_types(fp, Vector3, section, psk.points)
+                    psk.points = _read_array(fp, Vector3, section, psk.points)
                 case b'VTXW0000':
                     if section.data_size == ctypes.sizeof(Psk.Wedge16):
-                        _read_types(fp, Psk.Wedge16, section, psk.wedges)
+                        psk.wedges = _read_array(fp, Psk.Wedge16, section, psk.wedges)
                     elif section.data_size == ctypes.sizeof(Psk.Wedge32):
-                        _read_types(fp, Psk.Wedge32, section, psk.wedges)
+                        psk.wedges = _read_array(fp, Psk.Wedge32, section, psk.wedges)
                     else:
                         raise RuntimeError('Unrecognized wedge format')
                 case b'FACE0000':
-                    _read_types(fp, Psk.Face, section, psk.faces)
+                    psk.faces = _read_array(fp, Psk.Face, section, psk.faces)
                 case b'MATT0000':
                     _read_types(fp, Psk.Material, section, psk.materials)
                 case b'REFSKELT':
                     _read_types(fp, Psk.Bone, section, psk.bones)
                 case b'RAWWEIGHTS':
-                    _read_types(fp, Psk.Weight, section, psk.weights)
+                    psk.weights = _read_array(fp, Psk.Weight, section, psk.weights)
                 case b'FACE3200':
-                    _read_types(fp, Psk.Face32, section, psk.faces)
+                    psk.faces = _read_array(fp, Psk.Face32, section, psk.faces)
                 case b'VERTEXCOLOR':
-                    _read_types(fp, Color, section, psk.vertex_colors)
+                    psk.vertex_colors = _read_array(fp, Color, section, psk.vertex_colors)
                 case b'VTXNORMS':
-                    _read_types(fp, Vector3, section, psk.vertex_normals)
+                    psk.vertex_normals = _read_array(fp, Vector3, section, psk.vertex_normals)
                 case b'MRPHINFO':
                     _read_types(fp, Psk.MorphInfo, section, psk.morph_infos)
                 case b'MRPHDATA':
-                    _read_types(fp, Psk.MorphData, section, psk.morph_data)
+                    psk.morph_data = _read_array(fp, Psk.MorphData, section, psk.morph_data)
                 case _:
                     if section.name.startswith(b'EXTRAUVS'):
-                        _read_types(fp, Vector2, section, psk.extra_uvs)
+                        psk.extra_uvs = _read_array(fp, Vector2, section, psk.extra_uvs)
                     else:
                         # Section is not handled, skip it.
                         fp.seek(section.data_size * section.data_count, os.SEEK_CUR)
@@ -89,7 +187,6 @@ def read_psk(path: str) -> Psk:
     point index is a 16-bit integer and truncate the high bits.
     '''
     if len(psk.points) <= 65536:
-        for wedge in psk.wedges:
-            wedge.point_index &= 0xFFFF
+        psk.wedges['point_index'] &= 0xFFFF
 
     return psk
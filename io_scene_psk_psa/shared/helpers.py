@@ -1,16 +1,19 @@
 from typing import List, Iterable, cast, Tuple
 
 import bpy
+import numpy as np
 from bpy.props import CollectionProperty
 from bpy.types import AnimData, Object
 from bpy.types import Armature
 
 
-def rgb_to_srgb(c: float):
-    if c > 0.0031308:
-        return 1.055 * (pow(c, (1.0 / 2.4))) - 0.055
-    else:
-        return 12.92 * c
+def rgb_to_srgb(c: np.ndarray) -> np.ndarray:
+    """
+    Converts linear color component values to sRGB, element-wise.
+    @param c: An array of linear color component values in the range [0, 1].
+    @return: An array of the sRGB color component values.
+    """
+    return np.where(c > 0.0031308, 1.055 * np.power(c, 1.0 / 2.4) - 0.055, 12.92 * c)
 
 
 def get_nla_strips_in_frame_range(animation_data: AnimData, frame_min: float, frame_max: float):
@@ -0,0 +1,22 @@
+'''
+Numba is not bundled with Blender, but if it has been installed into Blender's Python environment, it is used to
+compile some of the heavier import loops. Functions decorated with `njit` are only compiled on their first call.
+
+When Numba is not available, `njit` leaves the decorated function as plain Python.
+Callers should check `HAS_NUMBA` and fall back to a NumPy implementation rather than calling the uncompiled function.
+
+Kernels that are called from worker threads should be compiled with `nogil=True` rather than `parallel=True`. Numba's
+threading layers are not safe to launch from several Python threads at once, and some (e.g., TBB) can hang the process
+on exit if they were first launched from a thread other than the main one.
+'''
+
+try:
+    from numba import njit
+    HAS_NUMBA = True
+except ImportError:
+    HAS_NUMBA = False
+
+    def njit(*args, **kwargs):
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+        return lambda function: function
@@ -0,0 +1,48 @@
+'''
+Vectorized quaternion functions for arrays of quaternions.
+
+Quaternions are stored in (w, x, y, z) order along the last axis, matching the order of mathutils' Quaternion. These are
+used by the importers to transform many bones or keys at once rather than one mathutils object at a time.
+'''
+
+import numpy as np
+
+
+def quaternion_multiply(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """
+    Calculates the Hamilton product of two arrays of quaternions.
+    @param a: An ...x4 array of quaternions in (w, x, y, z) order.
+    @param b: An ...x4 array of quaternions in (w, x, y, z) order. Must be broadcastable against a.
+    @return: An ...x4 array of the products a * b.
+    """
+    a0, a1, a2, a3 = a[..., 0], a[..., 1], a[..., 2], a[..., 3]
+    b0, b1, b2, b3 = b[..., 0], b[..., 1], b[..., 2], b[..., 3]
+    return np.stack((
+        a0 * b0 - a1 * b1 - a2 * b2 - a3 * b3,
+        a0 * b1 + a1 * b0 + a2 * b3 - a3 * b2,
+        a0 * b2 - a1 * b3 + a2 * b0 + a3 * b1,
+        a0 * b3 + a1 * b2 - a2 * b1 + a3 * b0
+    ), axis=-1)
+
+
+def quaternion_conjugate(q: np.ndarray) -> np.ndarray:
+    return q * np.array((1.0, -1.0, -1.0, -1.0), dtype=q.dtype)
+
+
+def quaternion_normalize(q: np.ndarray) -> np.ndarray:
+    # Zero-length quaternions are left as-is, rather than divided by zero.
+    length = np.linalg.norm(q, axis=-1, keepdims=True)
+    return q / np.where(length > 0.0, length, 1.0)
+
+
+def quaternion_to_matrix(q: np.ndarray) -> np.ndarray:
+    """
+    @param q: An ...x4 array of unit quaternions in (w, x, y, z) order.
+    @return: An ...x3x3 array of the equivalent rotation matrices.
+    """
+    w, x, y, z = q[..., 0], q[..., 1], q[..., 2], q[..., 3]
+    return np.stack((
+        np.stack((w * w + x * x - y * y - z * z, 2.0 * (x * y - w * z), 2.0 * (x * z + w * y)), axis=-1),
+        np.stack((2.0 * (x * y + w * z), w * w - x * x + y * y - z * z, 2.0 * (y * z - w * x)), axis=-1),
+        np.stack((2.0 * (x * z - w * y), 2.0 * (y * z + w * x), w * w - x * x - y * y + z * z), axis=-1)
+    ), axis=-2)